@@ -2,4 +2,6 @@
 from .cli_utils import *
 from .constraints import *
 from .matchers import *
+from .notifications import *
 from .types import *
+from .workspace import *
@@ -1,9 +1,11 @@
+from typing import Optional
+
 import typer
 from typing_extensions import Annotated
 
 from .cli_utils import load_papers, load_reviewers
 from .constraints import get_constraints
-from .logging import get_logger
+from .logging import get_logger, setup_logging
 from .matchers import get_matcher
 
 _logger = get_logger(__name__)
@@ -23,7 +25,12 @@ def match(
     constraint_names: list[str] = typer.Option(
         [], help="Names of the constraints"
     ),
+    log_file: Optional[bool] = typer.Option(
+        None, help="Write logs to a file (on unless IBERMATCHER_LOG_FILE=0)"
+    ),
 ):
+    setup_logging(log_to_file=log_file)
+
     # Load pools
     papers_collection = load_papers(papers_path)
     reviewers_collection = load_reviewers(reviewers_path)
@@ -46,8 +53,8 @@ def match(
         constraints,
         reviewers_per_paper,
     )
-    _logger.info(f"Solution: {solution}")
-    _logger.info(f"Score: {score}")
+    _logger.info("Solution: %s", solution)
+    _logger.info("Score: %s", score)
 
 
 if __name__ == "__main__":
@@ -16,6 +16,15 @@ def load_reviewers(path: str) -> dict[str, Reviewer]:
     return {reviewer.full_name: reviewer for reviewer in reviewers}
 
 
+def load_reviewer_emails(path: str) -> dict[str, str]:
+    """
+    Reads only the names and emails of the reviewers, without
+    encoding their categories.
+    """
+    reviewers_df = pd.read_excel(path, usecols=["full_name", "email"])
+    return dict(zip(reviewers_df["full_name"], reviewers_df["email"]))
+
+
 def load_papers(path: str) -> dict[str, Paper]:
     papers_df = pd.read_excel(path)
     papers_df["authors"] = papers_df["authors"].apply(
@@ -2,7 +2,9 @@
 
 from collections import Counter
 from functools import partial
-from typing import Callable
+from typing import Callable, Optional
+
+import numpy as np
 
 from .types import Paper, Reviewer
 
@@ -113,3 +115,58 @@ def get_constraints(
         )
 
     return constraints
+
+
+# Constraints that only depend on the paper and the reviewer
+STATIC_CONSTRAINTS = (
+    "reviewer_not_author",
+    "reviewers_not_authors_institutions",
+)
+
+
+def get_constraint_names(constraints: list[Callable]) -> Optional[list[str]]:
+    """
+    Recovers the names of constraints built with `get_constraints`.
+    Returns None if any constraint is not one of `CONSTRAINTS`.
+    """
+    names = []
+    for constraint in constraints:
+        func = getattr(constraint, "func", constraint)
+        name = next(
+            (name for name, fn in CONSTRAINTS.items() if fn is func), None
+        )
+        if name is None:
+            return None
+        names.append(name)
+    return names
+
+
+def get_eligibility_mask(
+    names: list[str],
+    papers_collection: dict[str, Paper],
+    reviewers_collection: dict[str, Reviewer],
+) -> np.ndarray:
+    """
+    Boolean (papers x reviewers) mask, following the order of the
+    collections, of the pairs allowed by the constraints that only depend
+    on the paper and the reviewer (`reviewer_not_author` and
+    `reviewers_not_authors_institutions`).
+    """
+    mask = np.ones((len(papers_collection), len(reviewers_collection)), bool)
+    reviewers_index = {name: j for j, name in enumerate(reviewers_collection)}
+    institutions_index: dict[str, list[int]] = {}
+    for j, reviewer in enumerate(reviewers_collection.values()):
+        institutions_index.setdefault(reviewer.institution, []).append(j)
+
+    for i, paper in enumerate(papers_collection.values()):
+        if "reviewer_not_author" in names:
+            authors = [
+                reviewers_index[author]
+                for author in paper.authors
+                if author in reviewers_index
+            ]
+            mask[i, authors] = False
+        if "reviewers_not_authors_institutions" in names:
+            for institution in paper.institutions:
+                mask[i, institutions_index.get(institution, [])] = False
+    return mask
@@ -1,10 +1,18 @@
+import atexit
 import logging
+import os
 import sys
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
+from queue import SimpleQueue
+from threading import Lock
+from typing import Optional
 
 _time = datetime.now()
 
+PACKAGE_LOGGER = "ibermatcher"
+
 COLORS = {
     "grey": "\x1b[38;20m",
     "yellow": "\x1b[33;20m",
@@ -14,6 +22,10 @@ COLORS = {
     "reset": "\x1b[0m",
 }
 
+_queue: SimpleQueue = SimpleQueue()
+_listener: Optional[QueueListener] = None
+_lock = Lock()
+
 
 def color_log(text: str, color: str) -> str:
     """
@@ -29,43 +41,123 @@ def color_log(text: str, color: str) -> str:
     return COLORS[color] + text + COLORS["reset"]
 
 
-def get_logger(module_name: str) -> logging.Logger:
+class _LazyFileHandler(logging.FileHandler):
+    """
+    File handler that creates the log directory when the first
+    record is written instead of when it is instantiated.
+    """
+
+    def __init__(self, filename: Path):
+        super().__init__(filename, delay=True)
+
+    def _open(self):
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()
+
+
+class SolutionSummary:
     """
-    Returns the logger used across TextMachina modules.
+    Wraps a solution to log a truncated view of it. The summary is only
+    built if the record is emitted.
 
     Args:
-        module_name (str): name of the module.
+        solution (dict[str, list[str]]): a solution.
+        max_papers (int): number of papers to show.
+    """
 
-    Returns:
-        logging.Logger: the logger.
+    def __init__(self, solution: dict[str, list[str]], max_papers: int = 3):
+        self.solution = solution
+        self.max_papers = max_papers
+
+    def __str__(self) -> str:
+        if not self.solution:
+            return str(self.solution)
+        items = list(self.solution.items())
+        shown = dict(items[: self.max_papers])
+        if len(items) <= self.max_papers:
+            return str(shown)
+        return f"{str(shown)[:-1]}, ... ({len(items)} papers)}}"
+
+
+def setup_logging(
+    log_to_file: Optional[bool] = None,
+    level: int = logging.INFO,
+    propagate: bool = True,
+) -> None:
+    """
+    Configures the IberMatcher loggers. Records are put in a queue by the
+    calling thread and written to stdout and, if `log_to_file`, to a log
+    file by a background listener. Calling it again reconfigures the
+    handlers instead of adding new ones.
+
+    Args:
+        log_to_file (Optional[bool]): whether to write a log file. If None,
+            it is disabled by setting `IBERMATCHER_LOG_FILE=0`.
+        level (int): logging level.
+        propagate (bool): whether records also reach the handlers of the
+            root logger, as configured by the application.
     """
-    logger = logging.getLogger(module_name)
-    logger.setLevel(logging.INFO)
-
-    formatter = logging.Formatter(
-        "[%(asctime)s] - %(levelname)s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
-
-    logfile = (
-        Path("logs")
-        .joinpath(
-            _time.strftime("%Y_%m_%d"),
-            _time.strftime("%H_%M_%S"),
-            "text-machina.log",
+    global _listener
+    if log_to_file is None:
+        log_to_file = os.environ.get("IBERMATCHER_LOG_FILE", "1") != "0"
+
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+
+        formatter = logging.Formatter(
+            "[%(asctime)s] - %(levelname)s - %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
         )
-        .absolute()
-    )
 
-    logfile.parent.mkdir(parents=True, exist_ok=True)
+        handlers: list[logging.Handler] = [logging.StreamHandler(sys.stdout)]
+        if log_to_file:
+            logfile = (
+                Path("logs")
+                .joinpath(
+                    _time.strftime("%Y_%m_%d"),
+                    _time.strftime("%H_%M_%S"),
+                    "ibermatcher.log",
+                )
+                .absolute()
+            )
+            handlers.append(_LazyFileHandler(logfile))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        logger = logging.getLogger(PACKAGE_LOGGER)
+        logger.setLevel(level)
+        logger.propagate = propagate
+        if not any(isinstance(h, QueueHandler) for h in logger.handlers):
+            logger.addHandler(QueueHandler(_queue))
+            atexit.register(_stop_listener)
+
+        _listener = QueueListener(_queue, *handlers)
+        _listener.start()
+
+
+def _stop_listener() -> None:
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+
 
-    fh = logging.FileHandler(logfile)
-    fh.setFormatter(formatter)
+def get_logger(module_name: str) -> logging.Logger:
+    """
+    Returns the logger used across IberMatcher modules, configuring
+    the logging on the first call.
 
-    sh = logging.StreamHandler(sys.stdout)
-    sh.setFormatter(formatter)
+    Args:
+        module_name (str): name of the module.
 
-    logger.addHandler(sh)
-    logger.addHandler(fh)
+    Returns:
+        logging.Logger: the logger.
+    """
+    if _listener is None:
+        setup_logging()
 
-    return logger
+    if not module_name.startswith(PACKAGE_LOGGER):
+        module_name = f"{PACKAGE_LOGGER}.{module_name}"
+    return logging.getLogger(module_name)
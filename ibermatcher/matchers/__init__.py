@@ -2,11 +2,13 @@
 from .beam_search import *
 from .branch_and_bound import *
 from .greedy import *
+from .milp import *
 
 MATCHERS: dict[str, Callable] = {
     "branch_and_bound": match_by_branch_and_bound,
     "greedy": match_by_greedy,
     "beam_search": match_by_beam_search,
+    "milp": match_by_milp,
 }
 
 
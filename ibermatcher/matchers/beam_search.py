@@ -1,4 +1,6 @@
-from typing import Callable
+from typing import Callable, Optional
+
+import numpy as np
 
 from ..types import Paper, Reviewer
 from .branch_and_bound import match_by_branch_and_bound
@@ -11,6 +13,8 @@ def match_by_beam_search(
     reviewers_per_paper: int,
     beam_size: int = 50,
     return_first_solution: bool = True,
+    scores: Optional[dict[str, dict[str, float]]] = None,
+    score_matrix: Optional[np.ndarray] = None,
 ):
     return match_by_branch_and_bound(
         papers_collection,
@@ -20,4 +24,6 @@ def match_by_beam_search(
         lower_bound=0.0,
         queue_maxsize=beam_size,
         return_first_solution=return_first_solution,
+        scores=scores,
+        score_matrix=score_matrix,
     )
@@ -2,7 +2,9 @@ from copy import deepcopy
 from queue import PriorityQueue
 from typing import Callable, Optional
 
-from ..logging import get_logger
+import numpy as np
+
+from ..logging import SolutionSummary, get_logger
 from ..types import Paper, PriorityEntry, Reviewer
 from .greedy import match_by_greedy
 from .utils import (
@@ -117,6 +119,8 @@ def match_by_branch_and_bound(
     lower_bound: Optional[float] = None,
     queue_maxsize: int = 0,
     relax_upper_bound: bool = False,
+    scores: Optional[dict[str, dict[str, float]]] = None,
+    score_matrix: Optional[np.ndarray] = None,
 ) -> tuple[dict[str, list[str]], float]:
     """
     Finds the optimal alignment by branch and bound, using a greedy
@@ -124,11 +128,16 @@ def match_by_branch_and_bound(
 
     This function behaves like beam search when `lower_bound=0.`
     and `queue_max_size > 0`.
+
+    Precomputed `scores`, or a `score_matrix` aligned with the
+    collections, can be passed to avoid recomputing them.
     """
     # Precompute scores of reviewers for the papers
-    precomputed_scores = precompute_scores(
-        papers_collection, reviewers_collection
-    )
+    if scores is None:
+        scores = precompute_scores(
+            papers_collection, reviewers_collection, score_matrix=score_matrix
+        )
+    precomputed_scores = scores
 
     # If a lower bound is not provided, use greedy as lower bound.
     if lower_bound is None:
@@ -138,6 +147,8 @@ def match_by_branch_and_bound(
             reviewers_collection,
             constraints,
             reviewers_per_paper,
+            scores=precomputed_scores,
+            score_matrix=score_matrix,
         )
 
         if not best_solution:
@@ -149,12 +160,12 @@ def match_by_branch_and_bound(
             )
             best_score = len(papers_collection) * reviewers_per_paper * 0.4
     else:
-        _logger.info(f"Lower bound provided: {lower_bound}")
+        _logger.info("Lower bound provided: %s", lower_bound)
         best_solution, best_score = {}, lower_bound
 
     best_score = -best_score  # Negative for maximization
-    _logger.info(f"Greedy solution: {best_solution}")
-    _logger.info(f"Greedy score: {abs(best_score)}")
+    _logger.info("Greedy solution: %s", SolutionSummary(best_solution))
+    _logger.info("Greedy score: %s", abs(best_score))
 
     # Prepare the queue and the empty solution
     first_solution: dict[str, list[str]] = {}
@@ -205,8 +216,8 @@ def match_by_branch_and_bound(
             if score < best_score:
                 best_solution, best_score = sol, score
                 if return_first_solution:
-                    _logger.info(f"Pruned branches: {pruned_branches}")
-                    _logger.info(f"Explored branches: {explored_branches}")
+                    _logger.info("Pruned branches: %d", pruned_branches)
+                    _logger.info("Explored branches: %d", explored_branches)
                     return best_solution, -best_score
 
     if best_solution is None:
@@ -216,6 +227,6 @@ def match_by_branch_and_bound(
         )
         return None, -1
 
-    _logger.info(f"Pruned branches: {pruned_branches}")
-    _logger.info(f"Explored branches: {explored_branches}")
+    _logger.info("Pruned branches: %d", pruned_branches)
+    _logger.info("Explored branches: %d", explored_branches)
     return best_solution, -best_score
@@ -1,13 +1,26 @@
 from copy import deepcopy
 from queue import PriorityQueue
-from typing import Callable
+from typing import Callable, Optional
 
+import numpy as np
+
+from ..constraints import get_constraint_names, get_eligibility_mask
 from ..logging import get_logger
 from ..types import Paper, Reviewer
-from .utils import get_score, is_feasible, precompute_scores, shuffle_dict
+from .utils import (
+    get_score,
+    get_shortlists,
+    is_feasible,
+    precompute_score_matrix,
+    precompute_scores,
+    shuffle_dict,
+)
 
 _logger = get_logger(__name__)
 
+# Reviewers ranked for each paper, per reviewer to assign
+SHORTLIST_FACTOR = 4
+
 
 def _get_greedy_solution(
     papers_collection: dict[str, Paper],
@@ -45,18 +58,276 @@ def _get_greedy_solution(
     return sol
 
 
+def _select_reviewers(
+    candidates: list[int],
+    reviewers_per_paper: int,
+    load: list[int],
+    institutions: Optional[list[int]] = None,
+) -> list[int]:
+    """
+    Selects the first `reviewers_per_paper` candidates with remaining load,
+    at most one per institution if `institutions` codes are given.
+    Candidates must be sorted by score. May return fewer reviewers.
+    """
+    selected: list[int] = []
+    seen_institutions = set()
+    for reviewer in candidates:
+        if load[reviewer] <= 0:
+            continue
+        if institutions is not None:
+            if institutions[reviewer] in seen_institutions:
+                continue
+            seen_institutions.add(institutions[reviewer])
+        selected.append(reviewer)
+        if len(selected) == reviewers_per_paper:
+            break
+    return selected
+
+
+def _get_vectorized_greedy_solution(
+    score_matrix: np.ndarray,
+    mask: np.ndarray,
+    shortlists: np.ndarray,
+    reviewers_per_paper: int,
+    order: np.ndarray,
+    capacity: Optional[int] = None,
+    institutions: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Greedy pass over the score matrix, assigning to each paper in `order`
+    the top `reviewers_per_paper` eligible reviewers with remaining
+    `capacity`. If `institutions` codes are given, at most one reviewer per
+    institution is assigned to each paper. Only the `shortlists` are
+    scanned, unless they run out of available reviewers.
+
+    Returns the (papers x reviewers_per_paper) matrix of reviewer indices.
+    """
+    num_papers, num_reviewers = score_matrix.shape
+    load = [capacity if capacity is not None else num_papers] * num_reviewers
+    available = np.ones(num_reviewers, dtype=bool)
+    codes = institutions.tolist() if institutions is not None else None
+
+    # The shortlists are short: scanning them in Python is faster than
+    # running numpy operations over the full rows for each paper.
+    eligible = np.take_along_axis(mask, shortlists, axis=1)
+    candidates_per_paper = [
+        candidates[is_eligible].tolist()
+        for candidates, is_eligible in zip(shortlists, eligible)
+    ]
+
+    assignment = np.empty((num_papers, reviewers_per_paper), dtype=int)
+    for paper in order.tolist():
+        top = _select_reviewers(
+            candidates_per_paper[paper], reviewers_per_paper, load, codes
+        )
+
+        # Fall back to the best available reviewers, and to all
+        # of them if their institutions clash.
+        if len(top) < reviewers_per_paper:
+            row = score_matrix[paper]
+            candidates = np.flatnonzero(mask[paper] & available)
+            depth = min(candidates.size, shortlists.shape[1])
+            if depth > 0:
+                best = candidates[
+                    np.argpartition(-row[candidates], depth - 1)[:depth]
+                ]
+                best = best[np.argsort(-row[best], kind="stable")]
+                top = _select_reviewers(
+                    best.tolist(), reviewers_per_paper, load, codes
+                )
+            if len(top) < reviewers_per_paper and candidates.size > depth:
+                candidates = candidates[
+                    np.argsort(-row[candidates], kind="stable")
+                ]
+                top = _select_reviewers(
+                    candidates.tolist(), reviewers_per_paper, load, codes
+                )
+            if len(top) < reviewers_per_paper:
+                raise ValueError(
+                    f"There are not {reviewers_per_paper} reviewers to make a feasible solution for "
+                    f"the paper {paper}. Try relaxing your constraints."
+                )
+
+        for reviewer in top:
+            load[reviewer] -= 1
+            if load[reviewer] == 0:
+                available[reviewer] = False
+        assignment[paper] = top
+    return assignment
+
+
+def _get_regret_order(
+    score_matrix: np.ndarray,
+    mask: np.ndarray,
+    shortlists: np.ndarray,
+    reviewers_per_paper: int,
+) -> np.ndarray:
+    """
+    Orders the papers from the most to the least constrained (fewest
+    eligible reviewers), breaking ties by the regret: how much score is
+    lost if the best `reviewers_per_paper` reviewers are taken by others.
+    """
+    num_eligible = mask.sum(axis=1)
+    depth = min(2 * reviewers_per_paper, shortlists.shape[1])
+    best = np.take_along_axis(
+        np.where(mask, score_matrix, -np.inf), shortlists[:, :depth], axis=1
+    )
+    regret = best[:, :reviewers_per_paper].sum(axis=1) - best[
+        :, reviewers_per_paper:
+    ].sum(axis=1)
+    regret = np.where(np.isfinite(regret), regret, np.inf)
+    return np.lexsort((-regret, num_eligible))
+
+
+def _match_by_vectorized_greedy(
+    papers_collection: dict[str, Paper],
+    reviewers_collection: dict[str, Reviewer],
+    constraint_names: list[str],
+    reviewers_per_paper: int,
+    iters: int,
+    regret: bool,
+    scores: Optional[dict[str, dict[str, float]]],
+    score_matrix: Optional[np.ndarray],
+    mask: Optional[np.ndarray],
+    shortlists: Optional[np.ndarray],
+) -> tuple[dict[str, list[str]], float]:
+    """
+    Runs the vectorized greedy, first in regret order (if `regret`) or in
+    the order of the collection, and with random orders on failure.
+    """
+    paper_titles = list(papers_collection)
+    reviewer_names = list(reviewers_collection)
+    if score_matrix is None:
+        if scores is not None:
+            score_matrix = np.array(
+                [
+                    [scores[title][name] for name in reviewer_names]
+                    for title in paper_titles
+                ]
+            )
+        else:
+            score_matrix = precompute_score_matrix(
+                papers_collection, reviewers_collection
+            )
+
+    if mask is None:
+        mask = get_eligibility_mask(
+            constraint_names, papers_collection, reviewers_collection
+        )
+    capacity = (
+        reviewers_per_paper
+        if "reviewer_underload" in constraint_names
+        else None
+    )
+    if capacity is not None and capacity * len(
+        reviewer_names
+    ) < reviewers_per_paper * len(paper_titles):
+        _logger.error(
+            "%d reviewers can not cover %d papers with %d reviewers each."
+            " Try relaxing your constraints.",
+            len(reviewer_names),
+            len(paper_titles),
+            reviewers_per_paper,
+        )
+        return {}, 0.0
+
+    institutions = None
+    if "reviewers_from_different_institutions" in constraint_names:
+        _, institutions = np.unique(
+            [r.institution for r in reviewers_collection.values()],
+            return_inverse=True,
+        )
+
+    if shortlists is None:
+        shortlists = get_shortlists(
+            score_matrix, mask, SHORTLIST_FACTOR * reviewers_per_paper
+        )
+    if regret:
+        order = _get_regret_order(
+            score_matrix, mask, shortlists, reviewers_per_paper
+        )
+    else:
+        order = np.arange(len(paper_titles))
+
+    rng = np.random.default_rng()
+    for iteration in range(iters):
+        try:
+            assignment = _get_vectorized_greedy_solution(
+                score_matrix,
+                mask,
+                shortlists,
+                reviewers_per_paper,
+                order,
+                capacity=capacity,
+                institutions=institutions,
+            )
+        except ValueError:
+            order = rng.permutation(len(paper_titles))
+            continue
+
+        assigned_scores = np.take_along_axis(score_matrix, assignment, axis=1)
+        solution = {
+            title: [
+                reviewer_names[idx]
+                for idx in reviewers[np.argsort(-row, kind="stable")]
+            ]
+            for title, reviewers, row in zip(
+                paper_titles, assignment, assigned_scores
+            )
+        }
+        _logger.info("Greedy solution found after %d passes", iteration + 1)
+        return solution, assigned_scores.sum(dtype=np.float64).item()
+
+    _logger.error(
+        "No greedy solution found after %d iterations. Try relaxing your constraints.",
+        iters,
+    )
+    return {}, 0.0
+
+
 def match_by_greedy(
     papers_collection: dict[str, Paper],
     reviewers_collection: dict[str, Reviewer],
     constraints: list[Callable],
     reviewers_per_paper: int,
     iters: int = 5000,
+    scores: Optional[dict[str, dict[str, float]]] = None,
+    score_matrix: Optional[np.ndarray] = None,
+    regret: bool = True,
+    mask: Optional[np.ndarray] = None,
+    shortlists: Optional[np.ndarray] = None,
 ) -> tuple[dict[str, list[str]], float]:
     """
     Wraps _match_by_greedy to iter `iters` times with different orders.
+    Precomputed `scores`, or a `score_matrix` aligned with the
+    collections, can be passed to avoid recomputing them, as well as
+    the eligibility `mask` of the constraints and the `shortlists` of
+    each paper (see `get_shortlists`).
+
+    If all the constraints come from `CONSTRAINTS`, the vectorized greedy
+    is used instead, assigning first the papers with highest regret when
+    `regret=True`, and stopping at the first feasible solution.
     """
+    constraint_names = get_constraint_names(constraints)
+    if constraint_names is not None:
+        return _match_by_vectorized_greedy(
+            papers_collection,
+            reviewers_collection,
+            constraint_names,
+            reviewers_per_paper,
+            iters,
+            regret,
+            scores,
+            score_matrix,
+            mask,
+            shortlists,
+        )
+
     solutions = []
-    scores = precompute_scores(papers_collection, reviewers_collection)
+    if scores is None:
+        scores = precompute_scores(
+            papers_collection, reviewers_collection, score_matrix=score_matrix
+        )
     for _ in range(iters):
         try:
             solution = _get_greedy_solution(
@@ -74,7 +345,8 @@ def match_by_greedy(
 
     if not solutions:
         _logger.error(
-            f"No greedy solution found after {iters} iterations. Try relaxing your constraints."
+            "No greedy solution found after %d iterations. Try relaxing your constraints.",
+            iters,
         )
 
         return {}, 0.0
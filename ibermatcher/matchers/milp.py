@@ -0,0 +1,249 @@
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from threading import Thread
+from typing import Any, Callable, Optional
+
+import numpy as np
+from scipy.optimize import Bounds, LinearConstraint
+from scipy.optimize import milp as solve_milp
+from scipy.sparse import coo_array
+
+from ..constraints import get_constraint_names, get_eligibility_mask
+from ..logging import get_logger
+from ..types import Paper, Reviewer
+from .greedy import match_by_greedy
+from .utils import precompute_score_matrix
+
+_logger = get_logger(__name__)
+
+# Eligible reviewers kept as variables of each paper, per reviewer to assign
+CANDIDATES_FACTOR = 10
+
+# HiGHS does not check `time_limit` during presolve, so the solve is
+# abandoned after this many times the limit
+DEADLINE_FACTOR = 2
+
+
+def _indicator_matrix(groups: np.ndarray, num_groups: int) -> coo_array:
+    """
+    Sparse (groups x variables) matrix with a one where the variable
+    belongs to the group.
+    """
+    return coo_array(
+        (np.ones(len(groups)), (groups, np.arange(len(groups)))),
+        shape=(num_groups, len(groups)),
+    )
+
+
+def _solve_in_background(**kwargs: Any) -> Future:
+    """
+    Runs the solver in a daemon thread, which does not keep the
+    interpreter alive if the solve is abandoned.
+    """
+    future: Future = Future()
+
+    def solve() -> None:
+        try:
+            future.set_result(solve_milp(**kwargs))
+        except Exception as e:
+            future.set_exception(e)
+
+    Thread(target=solve, daemon=True).start()
+    return future
+
+
+def match_by_milp(
+    papers_collection: dict[str, Paper],
+    reviewers_collection: dict[str, Reviewer],
+    constraints: list[Callable],
+    reviewers_per_paper: int,
+    time_limit: Optional[float] = None,
+    mip_gap: Optional[float] = None,
+    warm_start: bool = True,
+    top_candidates: Optional[int] = None,
+    scores: Optional[dict[str, dict[str, float]]] = None,
+    score_matrix: Optional[np.ndarray] = None,
+    mask: Optional[np.ndarray] = None,
+    shortlists: Optional[np.ndarray] = None,
+) -> tuple[dict[str, list[str]], float]:
+    """
+    Finds an alignment by mixed integer linear programming, solved with
+    the HiGHS solver bundled in SciPy.
+
+    One binary variable is created for each (paper, reviewer) pair allowed
+    by the static constraints, and the remaining constraints are linear:
+    `reviewers_per_paper` reviewers per paper, at most `reviewers_per_paper`
+    papers per reviewer, and at most one reviewer per institution and paper.
+
+    SciPy does not accept an initial solution, so the greedy solution is
+    used as incumbent when `warm_start=True`: it is returned if the solver
+    can not improve it within `time_limit` seconds, or if it does not
+    return within `DEADLINE_FACTOR` times that limit.
+
+    To keep the model small, only the `top_candidates` best eligible
+    reviewers of each paper (`CANDIDATES_FACTOR * reviewers_per_paper` by
+    default) and the pairs of the greedy solution are variables, so the
+    solution is optimal for that subset. Pass `top_candidates` equal to the
+    number of reviewers to solve the full model.
+
+    Precomputed `scores`, `score_matrix`, eligibility `mask` and greedy
+    `shortlists`, aligned with the collections, can be passed to avoid
+    recomputing them.
+    """
+    names = get_constraint_names(constraints)
+    if names is None:
+        raise ValueError(
+            "The milp matcher only supports the constraints in `CONSTRAINTS`."
+        )
+
+    if score_matrix is None:
+        score_matrix = precompute_score_matrix(
+            papers_collection, reviewers_collection
+        )
+    if mask is None:
+        mask = get_eligibility_mask(
+            names, papers_collection, reviewers_collection
+        )
+
+    # Greedy solution as incumbent
+    best_solution: dict[str, list[str]] = {}
+    best_score = 0.0
+    if warm_start:
+        best_solution, best_score = match_by_greedy(
+            papers_collection,
+            reviewers_collection,
+            constraints,
+            reviewers_per_paper,
+            scores=scores,
+            score_matrix=score_matrix,
+            mask=mask,
+            shortlists=shortlists,
+        )
+        _logger.info("Greedy score: %s", best_score)
+
+    # Variables only for the eligible pairs, the others are fixed to 0
+    num_papers, num_reviewers = score_matrix.shape
+    if top_candidates is None:
+        top_candidates = CANDIDATES_FACTOR * reviewers_per_paper
+    if top_candidates < num_reviewers:
+        candidates = np.argpartition(
+            np.where(mask, -score_matrix, np.inf), top_candidates - 1, axis=1
+        )[:, :top_candidates]
+        top = np.zeros_like(mask)
+        top[np.arange(num_papers)[:, None], candidates] = True
+        # The incumbent stays feasible in the reduced model
+        reviewer_index = {
+            name: j for j, name in enumerate(reviewers_collection)
+        }
+        for i, reviewer_names in enumerate(best_solution.values()):
+            for name in reviewer_names:
+                top[i, reviewer_index[name]] = True
+        mask = mask & top
+    pairs = np.flatnonzero(mask)
+    papers_idx, reviewers_idx = np.divmod(pairs, num_reviewers)
+    num_vars = len(pairs)
+
+    # Each paper gets exactly `reviewers_per_paper` reviewers
+    linear_constraints = [
+        LinearConstraint(
+            _indicator_matrix(papers_idx, num_papers),
+            reviewers_per_paper,
+            reviewers_per_paper,
+        )
+    ]
+
+    # Each reviewer reviews at most `reviewers_per_paper` papers
+    if "reviewer_underload" in names:
+        linear_constraints.append(
+            LinearConstraint(
+                _indicator_matrix(reviewers_idx, num_reviewers),
+                0,
+                reviewers_per_paper,
+            )
+        )
+
+    # At most one reviewer per institution for each paper. Only groups
+    # with more than one candidate lead to a constraint.
+    if "reviewers_from_different_institutions" in names:
+        _, institutions = np.unique(
+            [r.institution for r in reviewers_collection.values()],
+            return_inverse=True,
+        )
+        groups = (
+            papers_idx * (institutions.max() + 1) + institutions[reviewers_idx]
+        )
+        _, groups, counts = np.unique(
+            groups, return_inverse=True, return_counts=True
+        )
+        shared = counts[groups] > 1
+        _, shared_groups = np.unique(groups[shared], return_inverse=True)
+        if shared.any():
+            linear_constraints.append(
+                LinearConstraint(
+                    coo_array(
+                        (
+                            np.ones(shared.sum()),
+                            (shared_groups, np.flatnonzero(shared)),
+                        ),
+                        shape=(shared_groups.max() + 1, num_vars),
+                    ),
+                    0,
+                    1,
+                )
+            )
+
+    _logger.info(
+        "MILP with %d variables and %d constraints",
+        num_vars,
+        sum(c.A.shape[0] for c in linear_constraints),
+    )
+
+    options: dict = {"disp": False}
+    if time_limit is not None:
+        options["time_limit"] = time_limit
+    if mip_gap is not None:
+        options["mip_rel_gap"] = mip_gap
+
+    future = _solve_in_background(
+        c=-score_matrix.ravel()[pairs],
+        integrality=np.ones(num_vars),
+        bounds=Bounds(0, 1),
+        constraints=linear_constraints,
+        options=options,
+    )
+    deadline = None if time_limit is None else DEADLINE_FACTOR * time_limit
+    try:
+        result = future.result(timeout=deadline)
+    except FutureTimeoutError:
+        # The solver can not be interrupted, it finishes in background
+        _logger.warning("MILP solver did not return within %ss", deadline)
+        if not best_solution:
+            _logger.error(
+                "No solution can be found for this case."
+                "Try relaxing the constraints and reviewing your data."
+            )
+        return best_solution, best_score
+    _logger.info("MILP status: %s", result.message)
+
+    if result.x is None:
+        if not best_solution:
+            _logger.error(
+                "No solution can be found for this case."
+                "Try relaxing the constraints and reviewing your data."
+            )
+        return best_solution, best_score
+
+    score = -result.fun
+    if best_solution and score < best_score:
+        return best_solution, best_score
+
+    # Decode the solution sorting the reviewers of each paper by score
+    selected = pairs[result.x > 0.5]
+    selected = selected[np.argsort(-score_matrix.ravel()[selected])]
+    paper_titles = list(papers_collection)
+    reviewer_names = list(reviewers_collection)
+    solution: dict[str, list[str]] = {title: [] for title in paper_titles}
+    for i, j in zip(*np.divmod(selected, num_reviewers)):
+        solution[paper_titles[i]].append(reviewer_names[j])
+
+    return solution, score
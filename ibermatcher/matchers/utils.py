@@ -1,6 +1,6 @@
 from queue import PriorityQueue
 from random import shuffle
-from typing import Callable, Literal
+from typing import Callable, Literal, Optional
 
 import numpy as np
 
@@ -23,26 +23,75 @@ def sim_pairwise(
         raise ValueError("Invalid aggregation method. Choose 'max' or 'mean'.")
 
 
+def precompute_score_matrix(
+    papers_collection: dict[str, Paper],
+    reviewers_collection: dict[str, Reviewer],
+) -> np.ndarray:
+    """
+    Computes the (papers x reviewers) score matrix, following the order
+    of the collections, as the max cosine similarity between the paper
+    embedding and the category embeddings of each reviewer.
+    """
+    if not papers_collection or not reviewers_collection:
+        return np.zeros((len(papers_collection), len(reviewers_collection)))
+
+    papers = np.stack([paper.embedding for paper in papers_collection.values()])
+    papers = papers / np.linalg.norm(papers, axis=1, keepdims=True)
+
+    # Stack the category embeddings of all the reviewers and keep
+    # where each reviewer starts to reduce them afterwards.
+    embeddings = [
+        reviewer.embeddings for reviewer in reviewers_collection.values()
+    ]
+    offsets = np.cumsum([0] + [len(e) for e in embeddings[:-1]])
+    categories = np.concatenate(embeddings)
+    categories = categories / np.linalg.norm(categories, axis=1, keepdims=True)
+
+    similarities = papers @ categories.T
+    return np.maximum.reduceat(similarities, offsets, axis=1)
+
+
 def precompute_scores(
     papers_collection: dict[str, Paper],
     reviewers_collection: dict[str, Reviewer],
+    score_matrix: Optional[np.ndarray] = None,
 ) -> dict[str, dict[str, float]]:
-    scores: dict[str, dict[str, float]] = {}
-    for paper_title in papers_collection:
-        scores[paper_title] = {}
-        paper_embedding = papers_collection[paper_title].embedding
-        for reviewer_name in reviewers_collection:
-            reviewer_embeddings = reviewers_collection[reviewer_name].embeddings
-            score = sim_pairwise(reviewer_embeddings, paper_embedding)
-            scores[paper_title][reviewer_name] = score
-        scores[paper_title] = dict(
-            sorted(
-                scores[paper_title].items(), key=lambda x: x[1], reverse=True
-            )
+    """
+    Computes the scores of all the reviewers for each paper, sorted
+    from the highest to the lowest score. A precomputed `score_matrix`
+    aligned with the collections can be passed to avoid recomputing it.
+    """
+    if score_matrix is None:
+        score_matrix = precompute_score_matrix(
+            papers_collection, reviewers_collection
         )
+
+    reviewer_names = list(reviewers_collection)
+    scores: dict[str, dict[str, float]] = {}
+    for paper_title, row in zip(papers_collection, score_matrix):
+        order = np.argsort(-row, kind="stable")
+        scores[paper_title] = {
+            reviewer_names[idx]: row[idx].item() for idx in order
+        }
     return scores
 
 
+def get_shortlists(
+    score_matrix: np.ndarray, mask: np.ndarray, depth: int
+) -> np.ndarray:
+    """
+    Indices of the `depth` best reviewers of each paper, sorted by score,
+    with the non-eligible reviewers ranked last.
+    """
+    masked = np.where(mask, score_matrix, -np.inf)
+    depth = min(depth, score_matrix.shape[1])
+    shortlists = np.argpartition(-masked, depth - 1, axis=1)[:, :depth]
+    shortlist_scores = np.take_along_axis(masked, shortlists, axis=1)
+    return np.take_along_axis(
+        shortlists, np.argsort(-shortlist_scores, axis=1, kind="stable"), axis=1
+    )
+
+
 def get_score(sol: dict, scores: dict[str, dict[str, float]]) -> float:
     score = 0.0
     for paper_title, reviewer_names in sol.items():
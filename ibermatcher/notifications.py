@@ -0,0 +1,374 @@
+""" Notification of the assignments to the reviewers """
+
+import json
+import mailbox
+import smtplib
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from email.message import EmailMessage
+from queue import Empty, Queue
+from threading import Lock
+from typing import Iterable, Iterator, Optional
+
+import typer
+from typing_extensions import Annotated
+
+from .cli_utils import load_reviewer_emails
+from .logging import get_logger, setup_logging
+from .types import Email
+
+_logger = get_logger(__name__)
+
+
+def group_by_reviewer(solution: dict[str, list[str]]) -> dict[str, list[str]]:
+    """
+    Inverts a solution to get the papers assigned to each reviewer.
+    """
+    papers_by_reviewer: dict[str, list[str]] = {}
+    for paper_title, reviewer_names in solution.items():
+        for name in reviewer_names:
+            papers_by_reviewer.setdefault(name, []).append(paper_title)
+    return papers_by_reviewer
+
+
+def iter_reviewer_emails(
+    solution: dict[str, list[str]],
+    reviewer_emails: dict[str, str],
+    email_template: str,
+    subject: str = "",
+) -> Iterator[Email]:
+    """
+    Renders one email per reviewer with all their assigned papers, given
+    the email address of each reviewer name.
+    The template can use the `{reviewer}` and `{papers}` fields, the
+    latter being a list of paper titles, one per line.
+    """
+    for name, paper_titles in group_by_reviewer(solution).items():
+        papers = "\n".join(f"- {title}" for title in paper_titles)
+        yield Email(
+            to=reviewer_emails[name],
+            content=email_template.format(reviewer=name, papers=papers),
+            subject=subject,
+        )
+
+
+def to_message(email: Email, sender: str) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = sender
+    message["To"] = email.to
+    message["Subject"] = email.subject
+    message.set_content(email.content)
+    return message
+
+
+def write_mbox(emails: Iterable[Email], path: str, sender: str) -> int:
+    """
+    Dry-run delivery: writes the emails to an mbox file,
+    overwriting it if it exists.
+    """
+    # mailbox.mbox appends to existing files
+    open(path, "w").close()
+    count = 0
+    box = mailbox.mbox(path)
+    box.lock()
+    try:
+        for email in emails:
+            box.add(to_message(email, sender))
+            count += 1
+        box.flush()
+    finally:
+        box.unlock()
+        box.close()
+    return count
+
+
+def write_jsonl(emails: Iterable[Email], path: str) -> int:
+    """
+    Dry-run delivery: writes the emails to a JSONL file.
+    """
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for email in emails:
+            f.write(
+                json.dumps(
+                    {
+                        "to": email.to,
+                        "subject": email.subject,
+                        "content": email.content,
+                    },
+                    ensure_ascii=False,
+                )
+                + "\n"
+            )
+            count += 1
+    return count
+
+
+@dataclass
+class DeliveryReport:
+    sent: int = 0
+    failed: list[tuple[str, str]] = field(default_factory=list)
+
+
+class RateLimiter:
+    """
+    Spaces out calls to `wait` to at most `rate` calls per second.
+    """
+
+    def __init__(self, rate: Optional[float] = None):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next_time = 0.0
+        self._lock = Lock()
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_time - now
+            self._next_time = max(now, self._next_time) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+class SMTPPool:
+    """
+    Delivers emails through a pool of reusable SMTP connections, with at
+    most `max_connections` concurrent deliveries, `max_retries` retries
+    with exponential backoff for transient errors, and an optional
+    `rate_limit` in emails per second.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        sender: str,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        starttls: bool = False,
+        max_connections: int = 4,
+        max_retries: int = 3,
+        backoff: float = 1.0,
+        rate_limit: Optional[float] = None,
+        timeout: float = 30.0,
+    ):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self._rate_limiter = RateLimiter(rate_limit)
+        self._connections: Queue = Queue()
+
+    def __enter__(self) -> "SMTPPool":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        while True:
+            try:
+                connection = self._connections.get_nowait()
+            except Empty:
+                return
+            try:
+                connection.quit()
+            except (smtplib.SMTPException, OSError):
+                connection.close()
+
+    def send(self, email: Email) -> None:
+        """
+        Sends an email, reconnecting and retrying on transient errors.
+        """
+        message = to_message(email, self.sender)
+        for attempt in range(self.max_retries + 1):
+            self._rate_limiter.wait()
+            connection = None
+            try:
+                connection = self._acquire()
+                connection.send_message(message)
+                self._connections.put(connection)
+                return
+            except (smtplib.SMTPException, OSError) as e:
+                # The session is reset after a reply error, so the
+                # connection can be reused unless the server closed it
+                # (421). Otherwise, it is dropped.
+                if connection is not None:
+                    if self._is_reusable(connection, e):
+                        self._connections.put(connection)
+                    else:
+                        connection.close()
+                if not self._is_transient(e) or attempt == self.max_retries:
+                    raise
+                _logger.warning("Retrying email to %s: %s", email.to, e)
+                time.sleep(self.backoff * 2**attempt)
+
+    def send_all(self, emails: Iterable[Email]) -> DeliveryReport:
+        """
+        Sends the emails concurrently, consuming them lazily so that
+        only `max_connections` emails are in flight at any time. The
+        delivery stops on authentication errors, and the remaining
+        emails are reported as failed.
+        """
+        report = DeliveryReport()
+        pending: dict[Future, Email] = {}
+        auth_error: Optional[Exception] = None
+
+        def collect(done: set[Future]) -> None:
+            nonlocal auth_error
+            for future in done:
+                email = pending.pop(future)
+                error = future.exception()
+                if error is None:
+                    report.sent += 1
+                    continue
+                _logger.error("Email to %s failed: %s", email.to, error)
+                report.failed.append((email.to, str(error)))
+                if isinstance(error, smtplib.SMTPAuthenticationError):
+                    auth_error = error
+
+        with ThreadPoolExecutor(max_workers=self.max_connections) as executor:
+            for email in emails:
+                if len(pending) >= self.max_connections:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                if auth_error is not None:
+                    report.failed.append((email.to, "Not sent"))
+                    continue
+                pending[executor.submit(self.send, email)] = email
+            collect(wait(pending).done)
+
+        if auth_error is not None:
+            _logger.error(
+                "Delivery stopped, authentication failed: %s", auth_error
+            )
+        return report
+
+    def _acquire(self) -> smtplib.SMTP:
+        try:
+            return self._connections.get_nowait()
+        except Empty:
+            pass
+        connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                connection.starttls()
+            if self.username is not None and self.password is not None:
+                connection.login(self.username, self.password)
+        except Exception:
+            connection.close()
+            raise
+        return connection
+
+    @staticmethod
+    def _is_reusable(connection: smtplib.SMTP, error: Exception) -> bool:
+        if connection.sock is None:
+            return False
+        if isinstance(error, smtplib.SMTPRecipientsRefused):
+            return True
+        return (
+            isinstance(error, smtplib.SMTPResponseException)
+            and error.smtp_code != 421
+        )
+
+    @staticmethod
+    def _is_transient(error: Exception) -> bool:
+        # Wrong credentials fail every email, retrying is pointless
+        if isinstance(error, smtplib.SMTPAuthenticationError):
+            return False
+        # 5xx replies (including refused recipients) are permanent
+        if isinstance(error, smtplib.SMTPRecipientsRefused):
+            return all(code < 500 for code, _ in error.recipients.values())
+        if isinstance(error, smtplib.SMTPResponseException):
+            return error.smtp_code < 500
+        return True
+
+
+def notify(
+    solution_path: Annotated[
+        str, typer.Argument(help="Path to the solution (json file)")
+    ],
+    reviewers_path: Annotated[
+        str, typer.Argument(help="Path to the reviewers pool (excel file)")
+    ],
+    template_path: Annotated[
+        str,
+        typer.Argument(
+            help="Path to the email template, with {reviewer} and {papers}"
+        ),
+    ],
+    sender: Annotated[str, typer.Option(help="Sender address")],
+    subject: Annotated[str, typer.Option(help="Email subject")] = "",
+    host: Annotated[str, typer.Option(help="SMTP host")] = "localhost",
+    port: Annotated[int, typer.Option(help="SMTP port")] = 25,
+    username: Annotated[
+        Optional[str], typer.Option(help="SMTP username")
+    ] = None,
+    password: Annotated[
+        Optional[str],
+        typer.Option(help="SMTP password", envvar="IBERMATCHER_SMTP_PASSWORD"),
+    ] = None,
+    starttls: Annotated[bool, typer.Option(help="Use STARTTLS")] = False,
+    max_connections: Annotated[
+        int, typer.Option(help="Number of concurrent SMTP connections")
+    ] = 4,
+    rate_limit: Annotated[
+        Optional[float], typer.Option(help="Maximum emails per second")
+    ] = None,
+    dry_run: Annotated[
+        Optional[str],
+        typer.Option(help="Write the emails to this mbox or jsonl file"),
+    ] = None,
+    log_file: Annotated[
+        Optional[bool],
+        typer.Option(
+            help="Write logs to a file (on unless IBERMATCHER_LOG_FILE=0)"
+        ),
+    ] = None,
+):
+    setup_logging(log_to_file=log_file)
+    with open(solution_path, encoding="utf-8") as f:
+        solution = json.load(f)
+    with open(template_path, encoding="utf-8") as f:
+        email_template = f.read()
+    reviewer_emails = load_reviewer_emails(reviewers_path)
+
+    emails = iter_reviewer_emails(
+        solution, reviewer_emails, email_template, subject=subject
+    )
+
+    if dry_run is not None:
+        if dry_run.endswith(".jsonl"):
+            count = write_jsonl(emails, dry_run)
+        else:
+            count = write_mbox(emails, dry_run, sender)
+        _logger.info("%d emails written to %s", count, dry_run)
+        return
+
+    with SMTPPool(
+        host,
+        port,
+        sender,
+        username=username,
+        password=password,
+        starttls=starttls,
+        max_connections=max_connections,
+        rate_limit=rate_limit,
+    ) as pool:
+        report = pool.send_all(emails)
+    _logger.info("Sent emails: %d", report.sent)
+    if report.failed:
+        _logger.error("Failed emails: %d", len(report.failed))
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    typer.run(notify)
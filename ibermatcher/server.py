@@ -0,0 +1,303 @@
+""" Long-running local matching service """
+
+import json
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock
+from typing import Any, Optional
+from uuid import uuid4
+
+import typer
+from typing_extensions import Annotated
+
+from .constraints import CONSTRAINTS
+from .logging import get_logger, setup_logging
+from .matchers import MATCHERS
+from .workspace import Workspace, load_workspace
+
+_logger = get_logger(__name__)
+
+
+@dataclass
+class Job:
+    job_id: str
+    papers_path: str
+    reviewers_path: str
+    matcher: str
+    reviewers_per_paper: int
+    constraint_names: list[str] = field(default_factory=list)
+    matcher_kwargs: dict[str, Any] = field(default_factory=dict)
+    status: str = "queued"
+    solution: Optional[dict[str, list[str]]] = None
+    score: Optional[float] = None
+    error: Optional[str] = None
+    runtime: Optional[float] = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "matcher": self.matcher,
+            "reviewers_per_paper": self.reviewers_per_paper,
+            "constraint_names": self.constraint_names,
+            "solution": self.solution,
+            "score": self.score,
+            "error": self.error,
+            "runtime": self.runtime,
+        }
+
+
+def _check_strings(request: dict[str, Any], names: list[str]) -> None:
+    for name in names:
+        if not isinstance(request.get(name), str):
+            raise ValueError(f"`{name}` must be a string.")
+
+
+class MatchingService:
+    """
+    Keeps the loaded pools and their scores in memory, and runs match
+    jobs on a pool of workers. The encoder is kept warm by `get_encoder`.
+    Pools are reloaded only when their files are modified, and each pair
+    of pools is loaded once even if several jobs request it at once.
+    Only the last `max_finished_jobs` finished jobs are kept.
+    """
+
+    def __init__(self, workers: int = 2, max_finished_jobs: int = 100):
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._workspaces: dict[
+            tuple[str, str], tuple[tuple[float, float], Future[Workspace]]
+        ] = {}
+        self._jobs: dict[str, Job] = {}
+        # Finished job ids, oldest first
+        self._finished: dict[str, None] = {}
+        self.max_finished_jobs = max_finished_jobs
+        self._workspaces_lock = Lock()
+        self._jobs_lock = Lock()
+
+    def get_workspace(self, papers_path: str, reviewers_path: str) -> Workspace:
+        key = (os.path.abspath(papers_path), os.path.abspath(reviewers_path))
+        mtimes = (os.path.getmtime(key[0]), os.path.getmtime(key[1]))
+        with self._workspaces_lock:
+            cached = self._workspaces.get(key)
+            loading = cached is None or cached[0] != mtimes
+            if cached is not None and not loading:
+                future = cached[1]
+            else:
+                future = Future()
+                self._workspaces[key] = (mtimes, future)
+
+        # Loaded outside the lock, other jobs wait only for their own pools
+        if loading:
+            _logger.info("Loading pools: %s, %s", *key)
+            try:
+                future.set_result(load_workspace(*key))
+            except Exception as e:
+                with self._workspaces_lock:
+                    if self._workspaces.get(key, (None, None))[1] is future:
+                        del self._workspaces[key]
+                future.set_exception(e)
+        return future.result()
+
+    def submit(self, request: dict[str, Any]) -> Job:
+        """
+        Validates a job request and queues it for the workers.
+        """
+        _check_strings(request, ["papers_path", "reviewers_path", "matcher"])
+        reviewers_per_paper = request.get("reviewers_per_paper")
+        if (
+            not isinstance(reviewers_per_paper, int)
+            or isinstance(reviewers_per_paper, bool)
+            or reviewers_per_paper < 1
+        ):
+            raise ValueError(
+                "`reviewers_per_paper` must be a positive integer."
+            )
+        if request["matcher"] not in MATCHERS:
+            raise ValueError(
+                f"{request['matcher']} matcher is not implemented."
+            )
+        constraint_names = request.get("constraint_names", [])
+        if not isinstance(constraint_names, list) or not all(
+            isinstance(name, str) for name in constraint_names
+        ):
+            raise ValueError("`constraint_names` must be a list of strings.")
+        for name in constraint_names:
+            if name not in CONSTRAINTS:
+                raise ValueError(f"{name} constraint is not supported.")
+        if not isinstance(request.get("matcher_kwargs", {}), dict):
+            raise ValueError("`matcher_kwargs` must be an object.")
+
+        job = Job(
+            job_id=uuid4().hex,
+            papers_path=request["papers_path"],
+            reviewers_path=request["reviewers_path"],
+            matcher=request["matcher"],
+            reviewers_per_paper=reviewers_per_paper,
+            constraint_names=constraint_names,
+            matcher_kwargs=request.get("matcher_kwargs", {}),
+        )
+        with self._jobs_lock:
+            self._jobs[job.job_id] = job
+        self._executor.submit(self._run, job)
+        return job
+
+    def get_job(self, job_id: str) -> Optional[Job]:
+        with self._jobs_lock:
+            return self._jobs.get(job_id)
+
+    def delete_job(self, job_id: str) -> Optional[Job]:
+        """
+        Discards a finished job. Queued and running jobs are kept.
+        """
+        with self._jobs_lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job_id in self._finished:
+                del self._jobs[job_id]
+                del self._finished[job_id]
+            return job
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job: Job) -> None:
+        job.status = "running"
+        start = time.perf_counter()
+        # The status is set last, so a finished job is always complete
+        try:
+            workspace = self.get_workspace(job.papers_path, job.reviewers_path)
+            solution, score = workspace.match(
+                job.matcher,
+                job.reviewers_per_paper,
+                job.constraint_names,
+                **job.matcher_kwargs,
+            )
+        except Exception as e:
+            _logger.error("Job %s failed: %s", job.job_id, e)
+            job.error = str(e)
+            job.runtime = time.perf_counter() - start
+            job.status = "failed"
+        else:
+            job.solution, job.score = solution, score
+            job.runtime = time.perf_counter() - start
+            job.status = "done"
+
+        with self._jobs_lock:
+            self._finished[job.job_id] = None
+            while len(self._finished) > self.max_finished_jobs:
+                oldest = next(iter(self._finished))
+                del self._finished[oldest]
+                del self._jobs[oldest]
+
+
+class MatchingRequestHandler(BaseHTTPRequestHandler):
+    """
+    JSON API of the matching service:
+        GET  /health          -> service status
+        POST /pools           -> preload the pools of a job
+        POST /jobs            -> queue a match job, returns its `job_id`
+        GET  /jobs/<job_id>   -> status and result of a job
+        DELETE /jobs/<job_id> -> discard a finished job
+    """
+
+    service: MatchingService
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send(HTTPStatus.OK, {"status": "ok"})
+        elif self.path.startswith("/jobs/"):
+            job = self.service.get_job(self.path.removeprefix("/jobs/"))
+            if job is None:
+                self._send(HTTPStatus.NOT_FOUND, {"error": "Job not found."})
+            else:
+                self._send(HTTPStatus.OK, job.to_dict())
+        else:
+            self._send(HTTPStatus.NOT_FOUND, {"error": "Unknown endpoint."})
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(request, dict):
+                raise ValueError("The request body must be a JSON object.")
+            if self.path == "/jobs":
+                job = self.service.submit(request)
+                self._send(HTTPStatus.ACCEPTED, {"job_id": job.job_id})
+            elif self.path == "/pools":
+                _check_strings(request, ["papers_path", "reviewers_path"])
+                workspace = self.service.get_workspace(
+                    request["papers_path"], request["reviewers_path"]
+                )
+                self._send(
+                    HTTPStatus.OK,
+                    {
+                        "papers": len(workspace.papers_collection),
+                        "reviewers": len(workspace.reviewers_collection),
+                    },
+                )
+            else:
+                self._send(HTTPStatus.NOT_FOUND, {"error": "Unknown endpoint."})
+        except (KeyError, ValueError, OSError) as e:
+            self._send(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+
+    def do_DELETE(self):
+        if not self.path.startswith("/jobs/"):
+            self._send(HTTPStatus.NOT_FOUND, {"error": "Unknown endpoint."})
+            return
+        job = self.service.delete_job(self.path.removeprefix("/jobs/"))
+        if job is None:
+            self._send(HTTPStatus.NOT_FOUND, {"error": "Job not found."})
+        elif job.status in ("queued", "running"):
+            self._send(HTTPStatus.CONFLICT, {"error": "Job is not finished."})
+        else:
+            self._send(HTTPStatus.OK, {"job_id": job.job_id})
+
+    def log_message(self, format: str, *args: Any) -> None:
+        _logger.info(format, *args)
+
+    def _send(self, status: HTTPStatus, body: dict[str, Any]) -> None:
+        content = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+def serve(
+    host: Annotated[str, typer.Option(help="Host to bind")] = "127.0.0.1",
+    port: Annotated[int, typer.Option(help="Port to bind")] = 8765,
+    workers: Annotated[
+        int, typer.Option(help="Number of concurrent match jobs")
+    ] = 2,
+    max_finished_jobs: Annotated[
+        int, typer.Option(help="Number of finished jobs kept in memory")
+    ] = 100,
+    log_file: Annotated[
+        Optional[bool],
+        typer.Option(
+            help="Write logs to a file (on unless IBERMATCHER_LOG_FILE=0)"
+        ),
+    ] = None,
+):
+    setup_logging(log_to_file=log_file)
+    service = MatchingService(
+        workers=workers, max_finished_jobs=max_finished_jobs
+    )
+    handler = type("Handler", (MatchingRequestHandler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    _logger.info("Serving IberMatcher on http://%s:%d", host, port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    typer.run(serve)
@@ -0,0 +1,234 @@
+""" What-if sweeps over matching scenarios sharing the precomputation """
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from itertools import product
+from typing import Any, Optional
+
+import pandas as pd
+import typer
+from typing_extensions import Annotated
+
+from .constraints import get_constraints
+from .logging import get_logger, setup_logging
+from .matchers.utils import is_complete, is_feasible
+from .workspace import Workspace, load_workspace
+
+_logger = get_logger(__name__)
+
+
+@dataclass
+class Scenario:
+    matcher: str
+    reviewers_per_paper: int
+    constraint_names: list[str] = field(default_factory=list)
+    matcher_kwargs: dict[str, Any] = field(default_factory=dict)
+    name: str = ""
+
+    def __post_init__(self):
+        if not self.name:
+            constraints = "+".join(self.constraint_names) or "all"
+            self.name = (
+                f"{self.matcher}-k{self.reviewers_per_paper}-{constraints}"
+            )
+
+
+@dataclass
+class ScenarioResult:
+    scenario: Scenario
+    solution: dict[str, list[str]]
+    score: float
+    runtime: float
+    feasible: bool
+    error: Optional[str] = None
+    cpu_time: float = 0.0
+
+
+def build_grid(
+    matchers: list[str],
+    reviewers_per_paper: list[int],
+    constraint_sets: list[list[str]],
+    matcher_kwargs: Optional[dict[str, dict[str, Any]]] = None,
+) -> list[Scenario]:
+    """
+    Builds the cartesian product of matchers, reviewers per paper and
+    constraint sets, without duplicated scenarios. An empty constraint set
+    means all the constraints. `matcher_kwargs` maps matcher names to their
+    keyword arguments.
+    """
+    matcher_kwargs = matcher_kwargs or {}
+    scenarios: dict[str, Scenario] = {}
+    for matcher, k, names in product(
+        matchers, reviewers_per_paper, constraint_sets
+    ):
+        scenario = Scenario(
+            matcher=matcher,
+            reviewers_per_paper=k,
+            constraint_names=list(names),
+            matcher_kwargs=matcher_kwargs.get(matcher, {}),
+        )
+        scenarios.setdefault(scenario.name, scenario)
+    return list(scenarios.values())
+
+
+def run_scenario(workspace: Workspace, scenario: Scenario) -> ScenarioResult:
+    """
+    Runs a scenario, measuring its wall-clock `runtime` and the `cpu_time`
+    of its thread, which does not count the time waiting for other threads.
+    """
+    start, cpu_start = time.perf_counter(), time.thread_time()
+    try:
+        solution, score = workspace.match(
+            scenario.matcher,
+            scenario.reviewers_per_paper,
+            scenario.constraint_names,
+            **scenario.matcher_kwargs,
+        )
+    except Exception as e:
+        _logger.error("Scenario %s failed: %s", scenario.name, e)
+        return ScenarioResult(
+            scenario,
+            {},
+            0.0,
+            time.perf_counter() - start,
+            False,
+            str(e),
+            time.thread_time() - cpu_start,
+        )
+    runtime = time.perf_counter() - start
+    cpu_time = time.thread_time() - cpu_start
+
+    solution = solution or {}
+    constraints = get_constraints(
+        scenario.constraint_names,
+        workspace.papers_collection,
+        workspace.reviewers_collection,
+        scenario.reviewers_per_paper,
+    )
+    feasible = is_complete(
+        solution,
+        len(workspace.papers_collection),
+        scenario.reviewers_per_paper,
+    ) and is_feasible(solution, constraints)
+    return ScenarioResult(
+        scenario, solution, score, runtime, feasible, cpu_time=cpu_time
+    )
+
+
+def run_sweep(
+    workspace: Workspace, scenarios: list[Scenario], workers: int = 4
+) -> list[ScenarioResult]:
+    """
+    Runs the scenarios concurrently on the same workspace, so that the
+    embeddings and scores are computed only once, and the eligibility
+    masks once per set of constraints.
+
+    The shared precomputation is done before running the scenarios, so it
+    is not part of their runtimes. Concurrent scenarios compete for the
+    GIL, so their wall-clock runtimes are only comparable with `workers=1`,
+    while their CPU times are comparable in any case.
+    """
+    names = [scenario.name for scenario in scenarios]
+    if len(set(names)) < len(names):
+        raise ValueError("Scenario names must be unique.")
+
+    for scenario in scenarios:
+        try:
+            workspace.precompute(
+                scenario.matcher,
+                scenario.reviewers_per_paper,
+                scenario.constraint_names,
+            )
+        except ValueError:
+            # Reported by the scenario itself
+            pass
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(
+            executor.map(
+                lambda scenario: run_scenario(workspace, scenario), scenarios
+            )
+        )
+
+
+def assignment_overlap(
+    a: dict[str, list[str]], b: dict[str, list[str]]
+) -> float:
+    """
+    Jaccard similarity between the (paper, reviewer) pairs of two solutions.
+    """
+    pairs_a = {(paper, r) for paper, reviewers in a.items() for r in reviewers}
+    pairs_b = {(paper, r) for paper, reviewers in b.items() for r in reviewers}
+    if not pairs_a and not pairs_b:
+        return 1.0
+    return len(pairs_a & pairs_b) / len(pairs_a | pairs_b)
+
+
+def compare_results(results: list[ScenarioResult]) -> pd.DataFrame:
+    """
+    Comparison table with one row per scenario, including the assignment
+    overlap with each of the other scenarios.
+    """
+    rows = []
+    for result in results:
+        row = {
+            "scenario": result.scenario.name,
+            "matcher": result.scenario.matcher,
+            "reviewers_per_paper": result.scenario.reviewers_per_paper,
+            "constraints": ";".join(result.scenario.constraint_names) or "all",
+            "score": result.score,
+            "runtime": result.runtime,
+            "cpu_time": result.cpu_time,
+            "feasible": result.feasible,
+            "error": result.error,
+        }
+        for other in results:
+            row[f"overlap[{other.scenario.name}]"] = assignment_overlap(
+                result.solution, other.solution
+            )
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def sweep(
+    papers_path: Annotated[
+        str, typer.Argument(help="Path to the papers pool (excel file)")
+    ],
+    reviewers_path: Annotated[
+        str, typer.Argument(help="Path to the reviewers pool (excel file)")
+    ],
+    output_path: Annotated[
+        str, typer.Argument(help="Path to the comparison table (csv file)")
+    ],
+    matchers: list[str] = typer.Option(["greedy"], help="Matcher names"),
+    reviewers_per_paper: list[int] = typer.Option(
+        [2], help="Numbers of reviewers per paper"
+    ),
+    constraint_sets: list[str] = typer.Option(
+        [""],
+        help="Comma-separated constraint names of each set (empty for all)",
+    ),
+    workers: int = typer.Option(4, help="Number of concurrent scenarios"),
+    log_file: Optional[bool] = typer.Option(
+        None, help="Write logs to a file (on unless IBERMATCHER_LOG_FILE=0)"
+    ),
+):
+    setup_logging(log_to_file=log_file)
+    workspace = load_workspace(papers_path, reviewers_path)
+    scenarios = build_grid(
+        matchers,
+        reviewers_per_paper,
+        [
+            [name.strip() for name in names.split(",") if name.strip()]
+            for names in constraint_sets
+        ],
+    )
+    results = run_sweep(workspace, scenarios, workers=workers)
+    table = compare_results(results)
+    table.to_csv(output_path, index=False)
+    _logger.info("Comparison:\n%s", table.drop(columns="error").to_string())
+
+
+if __name__ == "__main__":
+    typer.run(sweep)
@@ -52,3 +52,4 @@ class PriorityEntry:
 class Email:
     to: str
     content: str
+    subject: str = ""
@@ -0,0 +1,153 @@
+""" In-memory state shared across matching runs on the same pools """
+
+import inspect
+from dataclasses import dataclass, field
+from functools import cached_property
+from threading import Lock
+from typing import Any, Optional
+
+import numpy as np
+
+from .cli_utils import load_papers, load_reviewers
+from .constraints import (
+    CONSTRAINTS,
+    STATIC_CONSTRAINTS,
+    get_constraints,
+    get_eligibility_mask,
+)
+from .matchers import get_matcher
+from .matchers.greedy import SHORTLIST_FACTOR
+from .matchers.utils import (
+    get_shortlists,
+    precompute_score_matrix,
+    precompute_scores,
+)
+from .types import Paper, Reviewer
+
+
+@dataclass
+class Workspace:
+    """
+    Pools and precomputed scores, computed once and reused by any
+    number of matching runs with different matchers and constraints.
+    Eligibility masks and shortlists are computed once per set of static
+    constraints, so they are shared by scenarios with the same constraints.
+    """
+
+    papers_collection: dict[str, Paper]
+    reviewers_collection: dict[str, Reviewer]
+    score_matrix: np.ndarray = field(init=False)
+    _masks: dict[frozenset[str], np.ndarray] = field(
+        init=False, default_factory=dict, repr=False
+    )
+    _shortlists: dict[tuple[frozenset[str], int], np.ndarray] = field(
+        init=False, default_factory=dict, repr=False
+    )
+    _lock: Lock = field(init=False, default_factory=Lock, repr=False)
+
+    def __post_init__(self):
+        self.score_matrix = precompute_score_matrix(
+            self.papers_collection, self.reviewers_collection
+        )
+
+    @cached_property
+    def scores(self) -> dict[str, dict[str, float]]:
+        """
+        Sorted scores of each paper, only needed by the matchers
+        that explore partial solutions (branch and bound, beam search).
+        """
+        return precompute_scores(
+            self.papers_collection,
+            self.reviewers_collection,
+            score_matrix=self.score_matrix,
+        )
+
+    def get_mask(
+        self, constraint_names: Optional[list[str]] = None
+    ) -> np.ndarray:
+        """
+        Eligibility mask of the constraints (all of them if not provided),
+        cached by their static constraints. The mask must not be modified.
+        """
+        key = self._static_key(constraint_names)
+        with self._lock:
+            if key not in self._masks:
+                self._masks[key] = get_eligibility_mask(
+                    list(key), self.papers_collection, self.reviewers_collection
+                )
+            return self._masks[key]
+
+    def get_shortlists(
+        self, constraint_names: Optional[list[str]], reviewers_per_paper: int
+    ) -> np.ndarray:
+        """
+        Greedy shortlists of each paper for the constraints, cached by their
+        static constraints and the number of reviewers per paper.
+        """
+        mask = self.get_mask(constraint_names)
+        key = (self._static_key(constraint_names), reviewers_per_paper)
+        with self._lock:
+            if key not in self._shortlists:
+                self._shortlists[key] = get_shortlists(
+                    self.score_matrix,
+                    mask,
+                    SHORTLIST_FACTOR * reviewers_per_paper,
+                )
+            return self._shortlists[key]
+
+    @staticmethod
+    def _static_key(constraint_names: Optional[list[str]]) -> frozenset[str]:
+        names = constraint_names or list(CONSTRAINTS)
+        return frozenset(name for name in names if name in STATIC_CONSTRAINTS)
+
+    def precompute(
+        self,
+        matcher: str,
+        reviewers_per_paper: int,
+        constraint_names: Optional[list[str]] = None,
+    ) -> dict[str, Any]:
+        """
+        Precomputed arguments of a matcher, built and cached on first use.
+        """
+        # Vectorized matchers take the mask, the others the sorted scores
+        precomputed: dict[str, Any] = {"score_matrix": self.score_matrix}
+        parameters = inspect.signature(get_matcher(matcher)).parameters
+        if "mask" in parameters:
+            precomputed["mask"] = self.get_mask(constraint_names)
+            if "shortlists" in parameters:
+                precomputed["shortlists"] = self.get_shortlists(
+                    constraint_names, reviewers_per_paper
+                )
+        else:
+            precomputed["scores"] = self.scores
+        return precomputed
+
+    def match(
+        self,
+        matcher: str,
+        reviewers_per_paper: int,
+        constraint_names: Optional[list[str]] = None,
+        **matcher_kwargs: Any,
+    ) -> tuple[dict[str, list[str]], float]:
+        """
+        Runs a matcher on the pools reusing the precomputed scores.
+        """
+        matcher_fn = get_matcher(matcher)
+        constraints = get_constraints(
+            constraint_names or [],
+            self.papers_collection,
+            self.reviewers_collection,
+            reviewers_per_paper,
+        )
+        return matcher_fn(
+            self.papers_collection,
+            self.reviewers_collection,
+            constraints,
+            reviewers_per_paper,
+            **self.precompute(matcher, reviewers_per_paper, constraint_names),
+            **matcher_kwargs,
+        )
+
+
+def load_workspace(papers_path: str, reviewers_path: str) -> Workspace:
+    return Workspace(load_papers(papers_path), load_reviewers(reviewers_path))